@@ -0,0 +1,63 @@
+"""Numba-compiled quaternion kernels, used when numba is installed.
+
+Unlike their counterparts in `mujoco_utils.quaternions`, the single-quaternion
+kernels here do not support batch dimensions: quaternions are (4,) and
+vectors are (3,) float64 arrays.
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True, fastmath=True)
+def mult_quat(quat1, quat2):
+    """Hamilton product of two quaternions `quat1` * `quat2`, (4,)."""
+    a1, b1, c1, d1 = quat1[0], quat1[1], quat1[2], quat1[3]
+    a2, b2, c2, d2 = quat2[0], quat2[1], quat2[2], quat2[3]
+    prod = np.empty(4)
+    prod[0] = a1 * a2 - b1 * b2 - c1 * c2 - d1 * d2
+    prod[1] = a1 * b2 + b1 * a2 + c1 * d2 - d1 * c2
+    prod[2] = a1 * c2 - b1 * d2 + c1 * a2 + d1 * b2
+    prod[3] = a1 * d2 + b1 * c2 - c1 * b2 + d1 * a2
+    return prod
+
+
+@numba.njit(cache=True, fastmath=True)
+def rotate_vec_with_quat(vec, quat):
+    """Rotates vector `vec` (3,) with quaternion `quat` (4,), which does not
+    have to be normalized."""
+    s, x, y, z = quat[0], quat[1], quat[2], quat[3]
+    scale = 2 / (s**2 + x**2 + y**2 + z**2)
+    # vec + scale * u x (u x vec + s vec), where u = (x, y, z).
+    t0 = y * vec[2] - z * vec[1] + s * vec[0]
+    t1 = z * vec[0] - x * vec[2] + s * vec[1]
+    t2 = x * vec[1] - y * vec[0] + s * vec[2]
+    rotated = np.empty(3)
+    rotated[0] = vec[0] + scale * (y * t2 - z * t1)
+    rotated[1] = vec[1] + scale * (z * t0 - x * t2)
+    rotated[2] = vec[2] + scale * (x * t1 - y * t0)
+    return rotated
+
+
+@numba.njit(cache=True, fastmath=True)
+def change_body_frame_batch(child_pos, child_quat, dquat, dpos):
+    """Child transform of `mjcf_utils.change_body_frame` for a batch of
+    children.
+
+    Args:
+        child_pos: Child positions in the old body frame, (N, 3).
+        child_quat: Child quaternions in the old body frame, (M, 4), M <= N.
+            Only the first M children have quaternions.
+        dquat: Old body quaternion in the new frame, (4,).
+        dpos: Old body position in the new frame, (3,).
+
+    Returns:
+        Child positions (N, 3) and quaternions (M, 4) in the new frame.
+    """
+    new_pos = np.empty_like(child_pos)
+    new_quat = np.empty_like(child_quat)
+    for i in range(child_quat.shape[0]):
+        new_quat[i] = mult_quat(dquat, child_quat[i])
+    for i in range(child_pos.shape[0]):
+        new_pos[i] = rotate_vec_with_quat(child_pos[i], dquat) + dpos
+    return new_pos, new_quat
@@ -1,5 +1,6 @@
 """Utilities for working with and manipulating MJCF models."""
 
+import functools
 from typing import Sequence
 from lxml import etree
 
@@ -7,11 +8,35 @@ import numpy as np
 from dm_control import mjcf
 
 from mujoco_utils.quaternions import (
-    conj_quat,
+    mult_conj_quat,
     mult_quat,
+    rotate_vec_with_inv_quat,
     rotate_vec_with_quat,
 )
 
+# Read-only defaults for unset pos and quat attributes.
+_IDENT_QUAT = np.array([1., 0., 0., 0.])
+_IDENT_QUAT.setflags(write=False)
+_ZERO3 = np.zeros(3)
+_ZERO3.setflags(write=False)
+
+# Whether elements have (pos, quat) attributes, by tag. Filled from the MJCF
+# schema on first encounter of each tag.
+_HAS_POS_QUAT = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_quat_numba():
+    """Returns the optional numba kernels module, or None without numba.
+
+    Imported on first use, so that importing mjcf_utils does not load numba.
+    """
+    try:
+        from mujoco_utils import _quat_numba
+    except ImportError:
+        return None
+    return _quat_numba
+
 
 def mjcf2xml(mjcf_model: mjcf.RootElement,
              output_file_name: str | None = None,
@@ -32,8 +57,10 @@ def mjcf2xml(mjcf_model: mjcf.RootElement,
         XML string or, if `output_file_name` is provided, saves XML string to file.
     """
     
-    # Dirty export to string first.
-    xml_string = mjcf_model.to_xml_string(
+    # Export to lxml tree directly, skipping the string round trip.
+    # Numeric attributes are formatted here, with precision and zero_threshold
+    # applied by dm_control to each attribute array in one np.savetxt call.
+    root = mjcf_model.to_xml(
         'float',
         precision=precision,
         zero_threshold=zero_threshold,
@@ -41,64 +68,80 @@ def mjcf2xml(mjcf_model: mjcf.RootElement,
     )
     
     # Remove empty default.
-    root = etree.XML(xml_string, etree.XMLParser(remove_blank_text=True))
     default_elem = root.find('default')
     root.insert(3, default_elem[0])
     root.remove(default_elem)
 
-    # Get string from lxml and remove class="/".
-    xml_string = etree.tostring(root, pretty_print=True)
-    xml_string = xml_string.replace(b' class="/"', b'')
-
-    # Remove gravcomp="0".
-    xml_string = xml_string.replace(b' gravcomp="0"', b'')
-
-    # Insert spaces between top level elements.
-    lines = xml_string.splitlines()
-    newlines = []
-    for line in lines:
-        newlines.append(line)
-        if line.startswith(b'  <'):
-            if line.startswith(b'  </') or line.endswith(b'/>'):
-                newlines.append(b'')
-    newlines.append(b'')
-    xml_string = b'\n'.join(newlines)
+    # Remove class="/" and gravcomp="0".
+    for elem in root.iter():
+        if elem.get('class') == '/':
+            del elem.attrib['class']
+        if elem.get('gravcomp') == '0':
+            del elem.attrib['gravcomp']
+
+    # Indent and insert spaces between top level elements. lxml won't
+    # pretty-print elements with whitespace tails, so indent manually.
+    etree.indent(root, space='  ')
+    for child in root:
+        child.tail = '\n\n  '
+    root[-1].tail = '\n\n'
+    root.tail = '\n'
 
     # Save generated XML string to file or return XML string.
     if output_file_name is not None:
-        with open(output_file_name, 'wb') as f:
-            f.write(xml_string)
+        etree.ElementTree(root).write(output_file_name)
     else:
-        return xml_string
+        return etree.tostring(root)
 
 
 def change_body_frame(body: mjcf.Element,
                       frame_pos: Sequence | None = None,
                       frame_quat: Sequence | None = None):
     """In-place change the frame of a body while maintaining child locations."""
-    frame_pos = np.zeros(3) if frame_pos is None else frame_pos
-    frame_quat = np.array((1., 0, 0, 0)) if frame_quat is None else frame_quat
+    frame_pos = _ZERO3 if frame_pos is None else frame_pos
+    frame_quat = _IDENT_QUAT if frame_quat is None else frame_quat
     # Get frame transformation.
-    body_pos = np.zeros(3) if body.pos is None else body.pos
+    body_pos = _ZERO3 if body.pos is None else body.pos
     dpos = body_pos - frame_pos
-    body_quat = np.array((1., 0, 0, 0)) if body.quat is None else body.quat
-    dquat = mult_quat(conj_quat(frame_quat), body_quat)
+    body_quat = _IDENT_QUAT if body.quat is None else body.quat
+    dquat = mult_conj_quat(frame_quat, body_quat)
     # Translate and rotate the body to the new frame.
     body.pos = frame_pos
     body.quat = frame_quat
-    # Move all its children to their previous location.
+    # Move all its children to their previous location, as one batch.
+    pos_and_quat, pos_only = [], []
     for child in body.all_children():
-        if not hasattr(child, 'pos'):
-            continue
+        if child.tag not in _HAS_POS_QUAT:
+            _HAS_POS_QUAT[child.tag] = (hasattr(child, 'pos'),
+                                        hasattr(child, 'quat'))
+        has_pos, has_quat = _HAS_POS_QUAT[child.tag]
+        if has_pos and has_quat:
+            pos_and_quat.append(child)
+        elif has_pos:
+            pos_only.append(child)
+    children = pos_and_quat + pos_only
+    if not children:
+        return
+    child_pos = np.stack([_ZERO3 if child.pos is None else child.pos
+                          for child in children])
+    child_quat = np.array([_IDENT_QUAT if child.quat is None else child.quat
+                           for child in pos_and_quat]).reshape(-1, 4)
+    # Child transform, partially evaluated: rotation by dquat followed by
+    # translation by dpos expressed in the new frame.
+    dpos = rotate_vec_with_inv_quat(dpos, frame_quat)
+    quat_numba = _load_quat_numba()
+    if quat_numba is not None:
+        new_pos, new_quat = quat_numba.change_body_frame_batch(
+            child_pos, child_quat, dquat, dpos)
+    else:
         # Rotate:
-        if hasattr(child, 'quat'):
-            child_quat = np.array(
-                (1., 0, 0, 0)) if child.quat is None else child.quat
-            child.quat = mult_quat(dquat, child_quat)
+        new_quat = mult_quat(dquat, child_quat)
         # Translate, accounting for rotations.
-        child_pos = np.zeros(3) if child.pos is None else child.pos
-        pos_in_parent = rotate_vec_with_quat(child_pos, body_quat) + dpos
-        child.pos = rotate_vec_with_quat(pos_in_parent, conj_quat(frame_quat))
+        new_pos = rotate_vec_with_quat(child_pos, dquat) + dpos
+    for child, quat in zip(pos_and_quat, new_quat):
+        child.quat = quat
+    for child, pos in zip(children, new_pos):
+        child.pos = pos
 
 
 def get_mjcf_tree(element: mjcf.Element,
@@ -109,18 +152,28 @@ def get_mjcf_tree(element: mjcf.Element,
         tree = get_mjcf_tree(mjcf_model.worldbody)
         print_tree(tree)
     """
-    tree = {}
-    if not element._children:
+    def get_children(element):
+        if bodies_only:
+            return [child for child in element._children if child.tag == 'body']
+        return element._children
+
+    children = get_children(element)
+    if not children:
         return ''
-    if bodies_only:
-        n_bodies = len([child for child in element._children 
-                        if child.tag == 'body'])
-        if n_bodies == 0:
-            return ''
-    for child in element._children:
-        if bodies_only and child.tag != 'body':
-            continue
-        tree[f'{child.tag}: {child.name}'] = get_mjcf_tree(child, bodies_only)
+    tree = {}
+    # Iterative traversal, each stack item is a list of (already filtered)
+    # children and the subtree dict to add them to.
+    stack = [(children, tree)]
+    while stack:
+        children, subtree = stack.pop()
+        for child in children:
+            key = f'{child.tag}: {child.name}'
+            grandchildren = get_children(child)
+            if grandchildren:
+                subtree[key] = {}
+                stack.append((grandchildren, subtree[key]))
+            else:
+                subtree[key] = ''
     return tree
 
 
@@ -5,16 +5,14 @@ from typing import Sequence
 import numpy as np
 from dm_control import mjcf
 
-from mujoco_utils.quaternions import (
-    rotate_vec_with_quat,
-    reciprocal_quat,
-)
+from mujoco_utils.quaternions import rotate_vec_with_inv_quat
 
 
 def site_pos_in_body_frame(physics: mjcf.Physics,
                            body_name: str,
                            site_xpos: Sequence | None = None,
                            site_name: str | None = None,
+                           out: np.ndarray | None = None,
                           ) -> np.ndarray:
     """Get site position in local reference frame of given body.
 
@@ -29,17 +27,50 @@ def site_pos_in_body_frame(physics: mjcf.Physics,
             must be provided.
         site_name: Name of site to get the position of. If site_xpos is
             provided, site_name is ignored.
+        out: Optional preallocated array of shape (3,) to write the result to,
+            e.g. to reuse the same array at every step of a rollout.
     Returns:
         Position of site in body's local frame, as if the site was child of this
-            body in the first place.
+            body in the first place. If `out` is provided, it is returned.
     """
     if site_xpos is None:
         site_xpos = physics.named.data.site_xpos[site_name]
     quat = physics.named.data.xquat[body_name]
     xpos = physics.named.data.xpos[body_name]
-    pos = rotate_vec_with_quat(site_xpos - xpos,
-                               reciprocal_quat(quat))
-    return pos
+    if out is None:
+        return rotate_vec_with_inv_quat(site_xpos - xpos, quat)
+    np.subtract(site_xpos, xpos, out=out)
+    return rotate_vec_with_inv_quat(out, quat, out=out)
+
+
+def site_pos_in_body_frame_batch(physics: mjcf.Physics,
+                                 body_names: Sequence[str],
+                                 site_xpos: np.ndarray | None = None,
+                                 site_names: Sequence[str] | None = None,
+                                ) -> np.ndarray:
+    """Get positions of multiple sites in local reference frames of given
+    bodies. Same as calling site_pos_in_body_frame for each (body, site) pair,
+    but vectorized.
+
+    Args:
+        physics: mjcf.Physics instance.
+        body_names: Names of bodies, (N,). Each site's coordinates will be
+            returned in the local reference frame of the corresponding body.
+        site_xpos: Site positions in world coordinates, (N, 3). If site_xpos is
+            provided, site_names is ignored. Either site_xpos or site_names
+            must be provided.
+        site_names: Names of sites to get the positions of, (N,). If site_xpos
+            is provided, site_names is ignored.
+    Returns:
+        Positions of sites in the bodies' local frames, (N, 3).
+    """
+    body_ids = [physics.model.name2id(name, 'body') for name in body_names]
+    if site_xpos is None:
+        site_ids = [physics.model.name2id(name, 'site') for name in site_names]
+        site_xpos = physics.data.site_xpos[site_ids]
+    quat = physics.data.xquat[body_ids]
+    xpos = physics.data.xpos[body_ids]
+    return rotate_vec_with_inv_quat(site_xpos - xpos, quat)
 
 
 def joint_to_dof_id(physics: mjcf.Physics,
@@ -81,24 +112,19 @@ def is_position_actuator(physics: mjcf.Physics,
     biasprm: (0, -kp, 0)    
     TODO: later could also consider biasprm: (0, -kp, -kv)
     """
-    biastype = physics.model.actuator_biastype[actuator_id]
+    if physics.model.actuator_biastype[actuator_id] != 1:
+        return False
     gainprm = physics.model.actuator_gainprm[actuator_id]
     biasprm = physics.model.actuator_biasprm[actuator_id]
-    print(gainprm[0], biasprm[1])
-    return (biastype == 1 and
-            np.isclose(gainprm[0], - biasprm[1]) and
-            all(gainprm[1:] == 0) and
-            biasprm[0] == 0 and
-            all(biasprm[2:] == 0))
+    if biasprm[0] != 0 or not np.isclose(gainprm[0], - biasprm[1]):
+        return False
+    return not gainprm[1:].any() and not biasprm[2:].any()
 
 
 def get_enabled_observables(walker) -> dict:
     """Get dict of enabled observables from walker."""
-    enabled_obs = {}
-    for k, v in walker.observables._observables.items():
-        if v.enabled:
-            enabled_obs[k] = v
-    return enabled_obs
+    return {k: v for k, v in walker.observables._observables.items()
+            if v.enabled}
 
 
 def get_critical_damping(physics: mjcf.Physics,
@@ -122,15 +148,52 @@ def get_critical_damping(physics: mjcf.Physics,
     if actuator_name is None:
         actuator_name = joint_name
 
-    joint_id = physics.named.model.jnt_qposadr[joint_name]
-    inertia = physics.model.dof_M0[joint_id]
+    joint_id = physics.model.name2id(joint_name, 'joint')
+    inertia = physics.model.dof_M0[physics.model.jnt_dofadr[joint_id]]
 
     spring_const = 0.
     if joint_spring:
-        spring_const = spring_const + physics.named.model.jnt_stiffness[joint_name]
+        spring_const = spring_const + physics.model.jnt_stiffness[joint_id]
+    if actuator_spring:
+        actuator_id = physics.model.name2id(actuator_name, 'actuator')
+        spring_const = (spring_const +
+                        physics.model.actuator_gainprm[actuator_id, 0])
+
+    critical_damping = 2 * np.sqrt(spring_const * inertia)
+    return critical_damping
+
+
+def get_critical_damping_batch(physics: mjcf.Physics,
+                               joint_names: Sequence[str],
+                               actuator_names: Sequence[str] | None = None,
+                               joint_spring: bool = True,
+                               actuator_spring: bool = True) -> np.ndarray:
+    """Calculate critical damping for multiple joints at once. Same as calling
+    get_critical_damping for each joint, but vectorized.
+
+    Args:
+        physics: A physics instance.
+        joint_names: Joint names to calculate critical damping for.
+        actuator_names: Actuator names if different from joint_names.
+        joint_spring: Whether to use joint (stiffness) spring constant.
+        actuator_spring: Whether to use actuator gainprm as spring constant.
+
+    Returns:
+        Critical damping for each joint, shape (n_joints,).
+    """
+    if actuator_names is None:
+        actuator_names = joint_names
+
+    joint_ids = [physics.model.name2id(name, 'joint') for name in joint_names]
+    inertia = physics.model.dof_M0[physics.model.jnt_dofadr[joint_ids]]
+
+    spring_const = np.zeros(len(joint_ids))
+    if joint_spring:
+        spring_const += physics.model.jnt_stiffness[joint_ids]
     if actuator_spring:
-        spring_const = (spring_const + 
-                        physics.named.model.actuator_gainprm[actuator_name][0])
+        actuator_ids = [physics.model.name2id(name, 'actuator')
+                        for name in actuator_names]
+        spring_const += physics.model.actuator_gainprm[actuator_ids, 0]
 
     critical_damping = 2 * np.sqrt(spring_const * inertia)
     return critical_damping
@@ -116,6 +116,13 @@ def rotate_vec_with_quat(vec, quat):
 
         vec' = quat vec quat^-1.
 
+    Computed in the equivalent Euler-Rodrigues form, without the two
+    quaternion products:
+
+        vec' = vec + 2 u x (u x vec + s vec) / |quat|^2,
+
+    where s = quat[0] and u = quat[1:].
+
     Any number of leading batch dimensions is supported.
 
     Technically, `quat` should be a unit quaternion, but in this particular
@@ -134,13 +141,71 @@ def rotate_vec_with_quat(vec, quat):
     Returns:
         Rotated vec, (B, 3,).
     """
-    if vec[..., :-1].size > quat[..., :-1].size:
-        # Broadcast quat to vec.
-        quat = np.tile(quat, vec.shape[:-1] + (1, ))
-    vec_aug = np.zeros_like(quat)
-    vec_aug[..., 1:] = vec
-    vec = mult_quat(quat, mult_quat(vec_aug, reciprocal_quat(quat)))
-    return vec[..., 1:]
+    vec = np.asarray(vec)
+    quat = np.asarray(quat)
+    s = quat[..., :1]
+    u = quat[..., 1:]
+    scale = 2 / np.sum(quat**2, axis=-1, keepdims=True)
+    return vec + scale * np.cross(u, np.cross(u, vec) + s * vec)
+
+
+def mult_conj_quat(quat1: np.ndarray, quat2: np.ndarray) -> np.ndarray:
+    """Computes the Hamilton product of the conjugate of `quat1` with `quat2`,
+    same as mult_quat(conj_quat(quat1), quat2) but without the intermediate
+    conjugate quaternion.
+
+    Any number of leading batch dimensions is supported.
+
+    Args:
+        quat1, quat2: Arrays of shape (B, 4) or (4,), broadcastable.
+
+    Returns:
+        Product of conj(quat1)*quat2, array of shape (B, 4) or (4,).
+    """
+    quat1 = np.asarray(quat1)
+    quat2 = np.asarray(quat2)
+    a1, b1, c1, d1 = quat1[..., 0], quat1[..., 1], quat1[..., 2], quat1[..., 3]
+    a2, b2, c2, d2 = quat2[..., 0], quat2[..., 1], quat2[..., 2], quat2[..., 3]
+    prod = np.empty(np.broadcast_shapes(quat1.shape, quat2.shape),
+                    dtype=np.result_type(quat1, quat2, float))
+    prod[..., 0] = a1 * a2 + b1 * b2 + c1 * c2 + d1 * d2
+    prod[..., 1] = a1 * b2 - b1 * a2 - c1 * d2 + d1 * c2
+    prod[..., 2] = a1 * c2 + b1 * d2 - c1 * a2 - d1 * b2
+    prod[..., 3] = a1 * d2 - b1 * c2 + c1 * b2 - d1 * a2
+    return prod
+
+
+def rotate_vec_with_inv_quat(vec, quat, out=None):
+    """Rotates vector `vec` with the inverse of quaternion `quat`, same as
+    rotate_vec_with_quat(vec, reciprocal_quat(quat)).
+
+    Uses the Euler-Rodrigues form directly instead of two quaternion
+    products:
+
+        vec' = vec + 2 u x (u x vec + s vec) / |quat|^2,
+
+    where s = quat[0] and u = -quat[1:].
+
+    Any number of leading batch dimensions is supported, vec and quat are
+    broadcast against each other.
+
+    Args:
+        vec: Cartesian position vector to rotate, shape (B, 3). Does not have
+            to be a unit vector.
+        quat: Rotation quaternion, (B, 4). Does not have to be normalized.
+        out: Optional preallocated array of shape (B, 3) to write the result
+            to. It may be `vec` itself.
+
+    Returns:
+        Rotated vec, (B, 3). If `out` is provided, it is returned.
+    """
+    vec = np.asarray(vec)
+    quat = np.asarray(quat)
+    s = quat[..., :1]
+    u = -quat[..., 1:]
+    scale = 2 / np.sum(quat**2, axis=-1, keepdims=True)
+    return np.add(vec, scale * np.cross(u, np.cross(u, vec) + s * vec),
+                  out=out)
 
 
 def get_egocentric_vec(root_xpos, site_xpos, root_quat):
@@ -1,6 +1,7 @@
 """General-purpose utilities."""
 
-from typing import Sequence
+import re
+from typing import Callable, Sequence
 
 
 def any_substr_in_str(substrings: Sequence[str], string: str) -> bool:
@@ -8,6 +9,24 @@ def any_substr_in_str(substrings: Sequence[str], string: str) -> bool:
     return any(s in string for s in substrings)
 
 
+def make_substr_matcher(substrings: Sequence[str]) -> Callable[[str], bool]:
+    """Returns function that checks if any of substrings is in its argument.
+
+    Same as any_substr_in_str, but the substrings are compiled into a single
+    regex alternation, so each check is one scan of the string instead of one
+    per substring. Create the matcher once and reuse it for many strings.
+
+    Example:
+    >>> matcher = make_substr_matcher(['coxa', 'femur'])
+    >>> matcher('coxa_T1_left'), matcher('head')
+    (True, False)
+    """
+    if not substrings:
+        return lambda string: False
+    search = re.compile('|'.join(re.escape(s) for s in substrings)).search
+    return lambda string: search(string) is not None
+
+
 def print_tree(tree: dict) -> None:
     """Prints tree view of a dict-like structure.
 
@@ -28,20 +47,18 @@ def print_tree(tree: dict) -> None:
               ├─── 123
               └─── 3.14
     """
-    def _tree(tree, last):
-        def get_str(last):
-            return ''.join(["\u2502    " if s else "     " for s in last[:-1]])
+    def _tree(tree, prefix):
         if not hasattr(tree, 'keys'):
-            last.append(False)
             if str(tree):
-                print(get_str(last) + '\u2514\u2500\u2500\u2500 ' + str(tree))
-            pop = last.pop()
-            while not pop and len(last):
-                pop = last.pop()
-        else:
-            for key in tree.keys():
-                last.append(False if key == list(tree.keys())[-1] else True)
-                cross = '\u251c' if last[-1] else '\u2514'
-                print(get_str(last) + cross + '\u2500\u2500\u2500 ' + str(key))
-                _tree(tree[key], last)
-    _tree(tree, last=[])
+                print(prefix + '\u2514\u2500\u2500\u2500 ' + str(tree))
+            return
+        keys = list(tree.keys())
+        n_last = len(keys) - 1
+        for i, key in enumerate(keys):
+            if i < n_last:
+                print(prefix + '\u251c\u2500\u2500\u2500 ' + str(key))
+                _tree(tree[key], prefix + '\u2502    ')
+            else:
+                print(prefix + '\u2514\u2500\u2500\u2500 ' + str(key))
+                _tree(tree[key], prefix + '     ')
+    _tree(tree, prefix='')
@@ -0,0 +1,39 @@
+"""Tests for mujoco_utils.quaternions."""
+
+import numpy as np
+import pytest
+
+from mujoco_utils.quaternions import (
+    mult_quat,
+    reciprocal_quat,
+    rotate_vec_with_quat,
+)
+
+
+def _rotate_vec_sandwich(vec, quat):
+    """Reference rotation quat vec quat^-1, by two quaternion products."""
+    batch_shape = np.broadcast_shapes(vec.shape[:-1], quat.shape[:-1])
+    quat = np.broadcast_to(quat, batch_shape + (4,))
+    vec_aug = np.zeros(batch_shape + (4,))
+    vec_aug[..., 1:] = vec
+    return mult_quat(quat, mult_quat(vec_aug, reciprocal_quat(quat)))[..., 1:]
+
+
+@pytest.mark.parametrize('vec_shape, quat_shape', [
+    ((3,), (4,)),
+    ((5, 3), (5, 4)),
+    ((5, 3), (4,)),
+    ((3,), (5, 4)),
+    # Broadcast cases from the rotate_vec_with_quat docstring.
+    ((1, 1, 3), (2, 7, 4)),
+    ((2, 7, 3), (1, 1, 4)),
+])
+def test_rotate_vec_with_quat(vec_shape, quat_shape):
+    rng = np.random.default_rng(0)
+    vec = rng.normal(size=vec_shape)
+    # Not normalized, the norm of quat cancels out in quat vec quat^-1.
+    quat = rng.normal(size=quat_shape)
+    rotated = rotate_vec_with_quat(vec, quat)
+    expected = _rotate_vec_sandwich(vec, quat)
+    assert rotated.shape == expected.shape
+    np.testing.assert_allclose(rotated, expected, rtol=1e-12, atol=1e-12)